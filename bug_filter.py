@@ -1,19 +1,52 @@
 import os
+import re
+import glob
 
-bugs = os.listdir("./bugs")
+# Known false-positive markers in the fused PHP script
+php_patterns = [
+    "php_strip_whitespace(__FILE__)", "set_error_handler", 'opcache_compile_file(__FILE__)',
+    'opcache_is_script_cached(__FILE__)', 'var_dump( gmdate($format, $timestamp) );', 'gmmktime',
+    "opcache_get_status()['jit']", '$config["directives"]["opcache.enable', 'opcache_get_status()', 'time'
+]
 
-for each in bugs:
+# Known false-positive markers in the JIT/non-JIT output diff
+diff_patterns = [
+    'Fatal error: The "yield" expression can only be used inside a function', "refcount(",
+    '--Seconds since Unix Epoch--', '+ noArray', '+noArray', 'float(1.0000000000000002)', 'JIT is disabled',
+    'on line 241', 'Server is not running'
+]
+
+# Build a single-pass matcher for all patterns (Aho-Corasick if available, regex alternation otherwise)
+def build_matcher(patterns):
+    try:
+        import ahocorasick
+    except ImportError:
+        regex = re.compile("|".join(map(re.escape, patterns)))
+        return lambda text: regex.search(text) is not None
+    automaton = ahocorasick.Automaton()
+    for pattern in patterns:
+        automaton.add_word(pattern, pattern)
+    automaton.make_automaton()
+    return lambda text: any(True for _ in automaton.iter(text))
+
+match_php = build_matcher(php_patterns)
+match_diff = build_matcher(diff_patterns)
+
+bugs = os.scandir("./bugs")
+
+for entry in bugs:
+    each = entry.name
     f = open(f"./bugs/{each}/diff", 'r', encoding = 'iso-8859-1')
     diff = f.read()
     f.close()
-    os.system(f"cp ./bugs/{each}/*_jit.php /tmp/test.php")
-    f = open(f"/tmp/test.php", 'r', encoding = 'iso-8859-1')
-    php = f.read()
-    f.close()
-    if "php_strip_whitespace(__FILE__)" in php or "set_error_handler" in php or 'Fatal error: The "yield" expression can only be used inside a function' in diff \
-       or "refcount(" in diff or 'opcache_compile_file(__FILE__)' in php or 'opcache_is_script_cached(__FILE__)' in php or 'var_dump( gmdate($format, $timestamp) );' in php \
-       or 'gmmktime' in php or '--Seconds since Unix Epoch--' in diff or "opcache_get_status()['jit']" in php or '+ noArray' in diff or 'float(1.0000000000000002)' in diff \
-       or '$config["directives"]["opcache.enable' in php or 'opcache_get_status()' in php or 'JIT is disabled' in diff or 'time' in php or 'on line 241' in diff or 'Server is not running' in diff:
+    jit_files = glob.glob(f"./bugs/{each}/*_jit.php")
+    if jit_files:
+        f = open(jit_files[0], 'r', encoding = 'iso-8859-1')
+        php = f.read()
+        f.close()
+    else:
+        php = ""
+    if match_php(php) or match_diff(diff):
         continue
     else:
         print(each)
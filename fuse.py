@@ -1,17 +1,98 @@
 # Import necessary libraries and modules
+import ast
 import sqlite3
-from random import randint, choice, random
+from random import randint, randrange, choice, choices, random, seed
 import re
 import time
 import subprocess
 import os
+import errno
 import shutil
+import multiprocessing
+from collections import defaultdict
 from dataflow import PHPFastDataflow
 from mutator import Mutator
 
 # Set to True to use simple concatenation as a baseline instead of intelligent fusion
 ConcatBaseline = False
 
+# Precompiled regular expressions used on every fused test
+_RE_MULTINL = re.compile(r"\n+")                               # runs of newlines
+_RE_SECTION = re.compile(r"--([_A-Z]+)--")                     # PHPT section markers
+_RE_SECTION_HEADER = re.compile(r"\n--([_A-Z]+)--(?=\n)")      # PHPT section header lines
+
+# Candidate values for each fuzzed PHP INI option
+_CONFIG_VALUES = {
+    "precision": [10, 12, 13, 14, 17],
+    "serialize_precision": [5, 10, 14, 15, 75, -1],
+    "memory_limit": ["2M", "33M", "16M", "20M", "32M", "100M", "256M", "512M", "5M", "8M", "128M", "6G", "-1"],
+    "post_max_size": ["1", "1M", "1024"],
+    "max_input_vars": [1, 4, 5, 10, 100, 1000],
+    "max_execution_time": [0, 1, 2, 10, 12, 60],
+    "default_charset": ["cp932", "big5", "ISO-8859-1", "UTF-8", "", "cp874", "cp936", "cp1251", "cp1252", "cp1253", "cp1254", "cp1255", "cp1256"],
+    "short_open_tag": ["on", "off", 1],
+    "auto_globals_jit": [0, 1],
+    "expose_php": [0, "On"],
+    "implicit_flush": [0, 1],
+    "allow_url_include": [0, 1],
+
+    # Timezone settings
+    "date.timezone": [
+        "Europe/London", "UTC", "Atlantic/Azores", "GMT", "America/Los_Angeles", "Asia/Singapore",
+        "Asia/Chongqing", "Europe/Amsterdam", "Europe/Berlin", "Europe/Paris", "America/New_York",
+        "America/Montreal", "America/Sao_Paulo", "America/Vancouver", "America/Mendoza", "Europe/Rome",
+        "GMT0", "Mars/Utopia_Planitia", "Incorrect/Zone"
+    ],
+
+    # Opcache settings
+    "opcache.enable": [0, 1],
+    "opcache.enable_cli": [0, 1],
+    "opcache.preload": ["{PWD}/" + each for each in [
+        "preload_undef_const_2.inc", "preload_variance_ind.inc", "preload_inheritance_error_ind.inc",
+        "preload_ind.inc", "preload_bug81256.inc", "preload_user.inc"
+    ]],
+    "opcache.jit": [0, 1205, 1235, 1255],
+    "opcache.jit_buffer_size": ["1M", "128M", "0"],
+    "opcache.jit_blacklist_root_trace": ["16", "255"],
+    "opcache.jit_blacklist_side_trace": ["8", "255"],
+    "opcache.jit_max_loop_unrolls": ["8", "10"],
+    "opcache.jit_max_recursive_calls": ["2", "10"],
+    "opcache.jit_max_recursive_returns": ["2", "4"],
+    "opcache.jit_max_polymorphic_calls": ["2", "1000"],
+    "opcache.file_update_protection": [0, 2],
+    "opcache.optimization_level": [-1, 0, 0x7fffffff, 0x4ff, 0x7FFFBFFF],
+    "opcache.memory_consumption": [7, 64],
+    "opcache.max_accelerated_files": [10, 1000000],
+    "opcache.revalidate_freq": [0, 60],
+    "opcache.validate_timestamps": [0, 1],
+    "opcache.interned_strings_buffer": [-1, 16, 131072],
+
+    # Session settings
+    "session.save_handler": ["files", "non-existent", "qwerty"],
+    "session.auto_start": [0, 1],
+    "session.use_cookies": [0, 1],
+    "session.cookie_httponly": [0, "TRUE"],
+    "session.cookie_secure": [0, "TRUE"],
+    "session.use_strict_mode": [0, 1],
+    "session.use_trans_sid": [0, 1],
+    "session.gc_maxlifetime": [300, 0],
+    "session.upload_progress.enabled": [0, 1],
+    "session.gc_probability": [0, 1],
+    "session.sid_length": [32],
+
+    # Error reporting settings
+    "error_reporting": [0, -1, 1, 8191, 14335, 2039, 2047, "E_ALL", "E_ALL^E_NOTICE", "E_ALL & ~E_DEPRECATED", "E_ALL & ~E_WARNING & ~E_NOTICE", "E_ALL & ~E_WARNING", "E_ALL & ~E_DEPRECATED", "E_ALL & E_NOTICE | E_PARSE ^ E_DEPRECATED & ~E_WARNING | !E_ERROR"],
+
+    # Mail settings
+    "sendmail_path": ["{MAIL:{PWD}/" + each + "}" for each in [
+        "mb_send_mail04.eml", "mailBasic7.out", "gh8086.eml", "mb_send_mail03.eml", "gh7902.eml"
+    ]]
+}
+_CONFIG_KEYS = list(_CONFIG_VALUES)
+
+# Template wrapping an instrumented call so exceptions do not abort the test
+_TRY_TMPL = "try {{{0}}} catch (Exception $e) {{ echo($e); }}"
+
 # Replace a random occurrence of a substring in a string
 def replace_random_occurrence(s, old, new):
     """
@@ -25,24 +106,131 @@ def replace_random_occurrence(s, old, new):
     Returns:
         str: String with one random occurrence replaced
     """
-    # Find all positions of the substring 'old'
-    positions = []
-    start = 0
-    while True:
-        start = s.find(old, start)
-        if start == -1:
-            break
-        positions.append(start)
-        start += len(old)
+    # Count occurrences and pick one of them to replace
+    count = s.count(old)
 
     # If no occurrences found, return the original string
-    if not positions:
+    if count == 0:
         return s
 
-    # Select a random position to replace the substring
-    random_pos = choice(positions)
+    # Locate the randomly selected occurrence
+    k = randrange(count)
+    random_pos = -len(old)
+    for _ in range(k + 1):
+        random_pos = s.find(old, random_pos + len(old))
     return s[:random_pos] + new + s[random_pos + len(old):]
 
+# Duplicate a file, hardlinking when possible
+def _dup(src, dst):
+    """
+    Duplicate a file by hardlinking it, replacing a stale dst and falling back
+    to a copy when the link cannot be created across filesystems.
+
+    Args:
+        src (str): Path to the source file
+        dst (str): Path to the duplicate
+    """
+    try:
+        os.link(src, dst)
+    except FileExistsError:
+        # a leftover from a previous round may already share src's inode
+        os.unlink(dst)
+        os.link(src, dst)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.copy(src, dst)
+
+# Remove the opening PHP tag from a code block
+def _strip_php_open(code):
+    """
+    Remove a leading '<?php' tag and surrounding newlines from PHP code.
+    
+    Args:
+        code (str): PHP code
+        
+    Returns:
+        str: PHP code without the opening tag
+    """
+    return code.removeprefix('<?php').strip('\n')
+
+# Split a PHPT test into its sections
+def _parse_phpt(test):
+    """
+    Parse a PHPT test into an ordered dict of sections in a single pass.
+    
+    Args:
+        test (str): Full test content
+        
+    Returns:
+        dict: Section name (e.g. "FILE") mapped to its content
+    """
+    sections = {}
+    # Prepend a newline so a header on the first line is matched as well
+    test = "\n" + test
+    headers = list(_RE_SECTION_HEADER.finditer(test))
+    for i, header in enumerate(headers):
+        end = headers[i + 1].start() if i + 1 < len(headers) else len(test)
+        name = header.group(1)
+        body = test[header.end():end].strip("\n")
+        sections[name] = f"{sections[name]}\n{body}" if name in sections else body
+    return sections
+
+# Assemble a PHPT test from its sections
+def _build_phpt(sections):
+    """
+    Join parsed PHPT sections back into a test.
+    
+    Args:
+        sections (dict): Section name mapped to its content
+        
+    Returns:
+        str: Test content in PHPT format
+    """
+    return "".join(f"--{name}--\n{body}\n" if body else f"--{name}--\n" for name, body in sections.items())
+
+# Append INI settings to parsed PHPT sections
+def _append_ini(sections, config):
+    """
+    Return a copy of the sections with config appended to the --INI-- section,
+    creating it right before --FILE-- if the test has none.
+    
+    Args:
+        sections (dict): Section name mapped to its content
+        config (str): INI settings to append
+        
+    Returns:
+        dict: New section mapping
+    """
+    new_sections = {}
+    for name, body in sections.items():
+        if name == "FILE" and "INI" not in sections:
+            new_sections["INI"] = config
+        if name == "INI":
+            body = f"{body}\n{config}" if body else config
+        new_sections[name] = body
+    return new_sections
+
+# Fusion instance used by the current worker process
+_worker_fusion = None
+
+# Set up a worker process for parallel test generation
+def _init_worker(fusion):
+    """
+    Initialize a test generation worker with an already-loaded Fusion instance.
+    Each worker reseeds its random generator so workers produce different tests.
+    
+    Args:
+        fusion (Fusion): Fusion instance with seeds and APIs loaded
+    """
+    global _worker_fusion
+    _worker_fusion = fusion
+    seed(os.getpid() ^ time.time_ns())
+
+# Generate one fused test case in a worker process
+def _gen_one_worker(i):
+    _worker_fusion._gen_one(i)
+
 # Fusion class for handling test file fusion and mutation
 class Fusion():
     """
@@ -126,76 +314,9 @@ opcache.jit=''' + jit_mode + '\n'
         Returns:
             str: Random configuration string in key=value format
         """
-        config_options = {
-            "precision": choice([10, 12, 13, 14, 17]),
-            "serialize_precision": choice([5, 10, 14, 15, 75, -1]),
-            "memory_limit": choice(["2M", "33M", "16M", "20M", "32M", "100M", "256M", "512M", "5M", "8M", "128M", "6G", "-1"]),
-            "post_max_size": choice(["1", "1M", "1024"]),
-            "max_input_vars": choice([1, 4, 5, 10, 100, 1000]),
-            "max_execution_time": choice([0, 1, 2, 10, 12, 60]),
-            "default_charset": choice(["cp932", "big5", "ISO-8859-1", "UTF-8", "", "cp874", "cp936", "cp1251", "cp1252", "cp1253", "cp1254", "cp1255", "cp1256"]),
-            "short_open_tag": choice(["on", "off", 1]),
-            "auto_globals_jit": choice([0, 1]),
-            "expose_php": choice([0, "On"]),
-            "implicit_flush": choice([0, 1]),
-            "allow_url_include": choice([0, 1]),
-
-            # Timezone settings
-            "date.timezone": choice([
-                "Europe/London", "UTC", "Atlantic/Azores", "GMT", "America/Los_Angeles", "Asia/Singapore",
-                "Asia/Chongqing", "Europe/Amsterdam", "Europe/Berlin", "Europe/Paris", "America/New_York",
-                "America/Montreal", "America/Sao_Paulo", "America/Vancouver", "America/Mendoza", "Europe/Rome",
-                "GMT0", "Mars/Utopia_Planitia", "Incorrect/Zone"
-            ]),
-
-            # Opcache settings
-            "opcache.enable": choice([0, 1]),
-            "opcache.enable_cli": choice([0, 1]),
-            "opcache.preload": "{PWD}/" + choice([
-                "preload_undef_const_2.inc", "preload_variance_ind.inc", "preload_inheritance_error_ind.inc",
-                "preload_ind.inc", "preload_bug81256.inc", "preload_user.inc"
-            ]),
-            "opcache.jit": choice([0, 1205, 1235, 1255]),
-            "opcache.jit_buffer_size": choice(["1M", "128M", "0"]),
-            "opcache.jit_blacklist_root_trace": choice(["16", "255"]),
-            "opcache.jit_blacklist_side_trace": choice(["8", "255"]),
-            "opcache.jit_max_loop_unrolls": choice(["8", "10"]),
-            "opcache.jit_max_recursive_calls": choice(["2", "10"]),
-            "opcache.jit_max_recursive_returns": choice(["2", "4"]),
-            "opcache.jit_max_polymorphic_calls": choice(["2", "1000"]),
-            "opcache.file_update_protection": choice([0, 2]),
-            "opcache.optimization_level": choice([-1, 0, 0x7fffffff, 0x4ff, 0x7FFFBFFF]),
-            "opcache.memory_consumption": choice([7, 64]),
-            "opcache.max_accelerated_files": choice([10, 1000000]),
-            "opcache.revalidate_freq": choice([0, 60]),
-            "opcache.validate_timestamps": choice([0, 1]),
-            "opcache.interned_strings_buffer": choice([-1, 16, 131072]),
-
-            # Session settings
-            "session.save_handler": choice(["files", "non-existent", "qwerty"]),
-            "session.auto_start": choice([0, 1]),
-            "session.use_cookies": choice([0, 1]),
-            "session.cookie_httponly": choice([0, "TRUE"]),
-            "session.cookie_secure": choice([0, "TRUE"]),
-            "session.use_strict_mode": choice([0, 1]),
-            "session.use_trans_sid": choice([0, 1]),
-            "session.gc_maxlifetime": choice([300, 0]),
-            "session.upload_progress.enabled": choice([0, 1]),
-            "session.gc_probability": choice([0, 1]),
-            "session.sid_length": choice([32]),
-
-            # Error reporting settings
-            "error_reporting": choice([0, -1, 1, 8191, 14335, 2039, 2047, "E_ALL", "E_ALL^E_NOTICE", "E_ALL & ~E_DEPRECATED", "E_ALL & ~E_WARNING & ~E_NOTICE", "E_ALL & ~E_WARNING", "E_ALL & ~E_DEPRECATED", "E_ALL & E_NOTICE | E_PARSE ^ E_DEPRECATED & ~E_WARNING | !E_ERROR"]),
-
-            # Mail settings
-            "sendmail_path": "{MAIL:{PWD}/" + choice([
-                "mb_send_mail04.eml", "mailBasic7.out", "gh8086.eml", "mb_send_mail03.eml", "gh7902.eml"
-            ]) + "}"
-        }
-
-        # Randomly select one key-value pair from the config options
-        random_key = choice(list(config_options.keys()))
-        return f"{random_key}={config_options[random_key]}"
+        # Pick the option first, then only draw a value for that option
+        random_key = choice(_CONFIG_KEYS)
+        return f"{random_key}={choice(_CONFIG_VALUES[random_key])}"
 
     # Randomly generate INI settings with possible JIT configuration
     def random_inis(self):
@@ -231,7 +352,8 @@ opcache.jit=''' + jit_mode + '\n'
 
         # we can mix our random class variables with the rest code context
         # NOTE: $clsAttr can be non-exist
-        dataflow1 += [["$cls","$clsAttr"]];
+        # NOTE: build a new list, the seed dataflows are shared across fusions
+        dataflow1 = dataflow1 + [["$cls","$clsAttr"]]
 
         if choice([True, False]):
             # Simple fusion: take one variable from each test and connect them
@@ -242,20 +364,8 @@ opcache.jit=''' + jit_mode + '\n'
             return test1, test2
 
         # Advanced fusion: identify the longest dataflows for interleaving
-        max_dataflow_1 = 0
-        max_dataflow_1_len = 0
-        max_dataflow_2 = 0
-        max_dataflow_2_len = 0
-
-        for each_dataflow in dataflow1:
-            if len(each_dataflow)>max_dataflow_1_len:
-                max_dataflow_1_len = len(each_dataflow)
-                max_dataflow_1 = each_dataflow
-
-        for each_dataflow in dataflow2:
-            if len(each_dataflow)>max_dataflow_2_len:
-                max_dataflow_2_len = len(each_dataflow)
-                max_dataflow_2 = each_dataflow
+        max_dataflow_1 = max(dataflow1, key=len)
+        max_dataflow_2 = max(dataflow2, key=len)
 
         test1_flow = choice(max_dataflow_1)
         test2_flow = choice(max_dataflow_2)
@@ -290,17 +400,11 @@ opcache.jit=''' + jit_mode + '\n'
         Returns:
             str: Generated API fuzzing code
         """
-        _instruments = []
         func, param_num = self.select_random_function()
         # we try 10 times to randomly fuzz the arguments
-        for i in range(10):
-            args = []
-            for x in range(param_num):
-                args.append(choice(defined_vars))
-            _instrument = f"{func}({','.join(args)});"
-            _instrument = "try {"+_instrument+"} catch (Exception $e) { echo($e); }"
-            _instruments.append(_instrument)
-        return '\n'+'\n'.join(_instruments)+'\n'
+        return '\n' + '\n'.join(
+            _TRY_TMPL.format(f"{func}({','.join(choices(defined_vars, k=param_num))});") for _ in range(10)
+        ) + '\n'
 
     def _instrumentation_classfuzz(self, defined_vars):
         """
@@ -314,49 +418,26 @@ opcache.jit=''' + jit_mode + '\n'
             tuple: (pre_instrumentation, after_instrumentation) with class-fuzzing code
         """
         _pre_instrument = []
-        _after_instrument = []
-
-        # Connect to the SQLite database
-        conn = sqlite3.connect(f'{self.test_root}/knowledges/class.db')
-        cursor = conn.cursor()
-
-        # Select a random class
-        cursor.execute('SELECT id, class_name FROM classes ORDER BY RANDOM() LIMIT 1')
-        class_row = cursor.fetchone()
-
-        if class_row:
-            class_id, class_name = class_row
-            _pre_instrument.append(f"\n$cls = new {class_name}();\n")
-
-            # Select a random attribute for the selected class
-            cursor.execute('SELECT name FROM attributes WHERE class_id = ? ORDER BY RANDOM() LIMIT 1', (class_id,))
-            attr_row = cursor.fetchone()
-            if attr_row:
-                attr_name = attr_row[0]
-                _pre_instrument.append(f"\n$clsAttr=$cls.{attr_name};\n")
-
-            # Select a random method for the selected class
-            cursor.execute('SELECT name, params_count FROM methods WHERE class_id = ? ORDER BY RANDOM() LIMIT 1', (class_id,))
-            method_row = cursor.fetchone()
-            if method_row:
-                method_name, params_count = method_row
-                # we try 10 times to randomly fuzz the arguments
-                for i in range(10):
-                    args = []
-                    for x in range(params_count):
-                        args.append(choice(defined_vars))
-                    _instrument = f"$cls->{method_name}({','.join(args)});"
-                    _instrument = "try {"+_instrument+"} catch (Exception $e) { echo($e); }"
-                    _after_instrument.append(_instrument)
-                _after_instrument = '\n'+'\n'.join(_after_instrument)+'\n'
-            else:
-                _after_instrument = ""
-        else:
-            print('No classes found in the database.')
-            exit()
-
-        # Close the database connection
-        conn.close()
+        _after_instrument = ""
+
+        # Select a random class from the cached class table
+        class_id, class_name = choice(self.classes)
+        _pre_instrument.append(f"\n$cls = new {class_name}();\n")
+
+        # Select a random attribute for the selected class
+        attrs = self.class_attrs[class_id]
+        if attrs:
+            attr_name = choice(attrs)
+            _pre_instrument.append(f"\n$clsAttr=$cls.{attr_name};\n")
+
+        # Select a random method for the selected class
+        methods = self.class_methods[class_id]
+        if methods:
+            method_name, params_count = choice(methods)
+            # we try 10 times to randomly fuzz the arguments
+            _after_instrument = '\n' + '\n'.join(
+                _TRY_TMPL.format(f"$cls->{method_name}({','.join(choices(defined_vars, k=params_count))});") for _ in range(10)
+            ) + '\n'
 
         _pre_instrument = '\n'+'\n'.join(_pre_instrument)+'\n'
 
@@ -373,12 +454,12 @@ opcache.jit=''' + jit_mode + '\n'
         Returns:
             str: Cleaned PHP code
         """
-        phpcode = phpcode.strip().strip('\n').strip("===DONE===").strip("==DONE==").strip("Done")
-        if phpcode.startswith('<?php'):
-            phpcode = phpcode[len('<?php'):].lstrip()
-        if phpcode.endswith('?>'):
-            phpcode = phpcode[:-len('?>')].rstrip()
-        phpcode = phpcode.strip("<?php").strip("?>")
+        phpcode = phpcode.strip()
+        # Drop trailing done markers printed after the closing tag
+        for tag in ("===DONE===", "==DONE==", "Done"):
+            phpcode = phpcode.removesuffix(tag).rstrip()
+        phpcode = phpcode.removeprefix('<?php').lstrip()
+        phpcode = phpcode.removesuffix('?>').rstrip()
         return '\n' + phpcode + '\n'
 
     # Read file content
@@ -404,8 +485,15 @@ opcache.jit=''' + jit_mode + '\n'
             filepath (str): Path to the file
             content (str): Content to write
         """
-        with open(filepath, "w") as f:
-            f.write(content)
+        # One-shot write through the raw fd, bypassing Python's buffered io stack.
+        # NOTE: iso-8859-1 round-trips the seed bytes, which are also read as iso-8859-1
+        data = memoryview(content.encode("iso-8859-1"))
+        fd = os.open(filepath, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            while data:
+                data = data[os.write(fd, data):]
+        finally:
+            os.close(fd)
 
     # Fuse two test cases while handling different sections
     def fuse(self):
@@ -417,16 +505,21 @@ opcache.jit=''' + jit_mode + '\n'
             str: Fused test case in PHPT format
         """
         # Select two random seeds to fuse
-        phpcode1, variable1, dataflow1, description1, configuration1, skipif1, extension1 = self.select_random_seed()
-        phpcode2, variable2, dataflow2, description2, configuration2, skipif2, extension2 = self.select_random_seed()
+        seed1 = self.select_random_seed()
+        seed2 = self.select_random_seed()
+
+        # Seed code is already stripped of headers/footers at load time
+        phpcode1 = self.seed_phpcodes[seed1]
+        phpcode2 = self.seed_phpcodes[seed2]
 
         # Apply mutations if enabled
-        phpcode1 = self.mut.mutate(phpcode1)
-        phpcode2 = self.mut.mutate(phpcode2)
+        if self.mutation:
+            phpcode1 = self.mut.mutate(phpcode1)
+            phpcode2 = self.mut.mutate(phpcode2)
 
         # Combine descriptions and configurations
-        fused_description = f"--TEST--\n{description1} + {description2}\n"
-        fused_configurations = f"\n--INI--\n{configuration1}\n{configuration2}\n{self.random_inis()}\n"
+        fused_description = f"--TEST--\n{self.seed_descriptions[seed1]} + {self.seed_descriptions[seed2]}\n"
+        fused_configurations = f"\n--INI--\n{self.seed_configurations[seed1]}\n{self.seed_configurations[seed2]}\n{self.random_inis()}\n"
 
         fused_skipif = ""
 
@@ -437,6 +530,8 @@ opcache.jit=''' + jit_mode + '\n'
         #     fused_skipif = ""
 
         # Combine extension requirements
+        extension1 = self.seed_extensions[seed1]
+        extension2 = self.seed_extensions[seed2]
         if extension1!="" or extension2!="":
             fused_extension = f"\n--EXTENSION--\n{extension1}\n{extension2}\n"
         else:
@@ -445,17 +540,13 @@ opcache.jit=''' + jit_mode + '\n'
         # Standard expected output
         fused_expect = "\n--EXPECT--\nthis is a flowfusion test\n"
 
-        # Clean PHP code headers/footers
-        phpcode1 = self.clean_php_header_tail(phpcode1)
-        phpcode2 = self.clean_php_header_tail(phpcode2)
-
         # Fuse the dataflows between the two test cases
-        new_phpcode1, new_phpcode2 = self._fuse_dataflow_interleave(phpcode1, phpcode2, eval(dataflow1), eval(dataflow2))
+        new_phpcode1, new_phpcode2 = self._fuse_dataflow_interleave(phpcode1, phpcode2, self.seed_dataflows[seed1], self.seed_dataflows[seed2])
 
         # Combine variables from both tests
-        variables = eval(variable1) + eval(variable2) + ['$fusion']
+        variables = self.seed_variables[seed1] + self.seed_variables[seed2] + ['$fusion']
 
-        # Class fuzzing (currently disabled for efficiency)
+        # Class fuzzing (currently disabled for efficiency; requires self.load_classes())
         # _pre_class_instrument, _after_class_instrument = self._instrumentation_classfuzz(variables)
 
         # API fuzzing if enabled
@@ -470,11 +561,11 @@ opcache.jit=''' + jit_mode + '\n'
         # Assemble the final PHP code
         fused_file = f"\n--FILE--\n<?php\n{new_phpcode1}\n{new_phpcode2}\n{_instrument_vardump}\n{_instrument_apifuzz}\n"
 
-        # Combine all sections into the final test
-        fused_test = f"{fused_description}{fused_configurations}{fused_skipif}{fused_extension}{fused_file}{fused_expect}"
+        # Combine all non-empty sections into the final test in one pass
+        fused_test = "\n".join(section for section in (fused_description, fused_configurations, fused_skipif, fused_extension, fused_file, fused_expect) if section)
 
         # Clean up extra newlines
-        fused_test = re.sub("\n+", "\n", fused_test)
+        fused_test = _RE_MULTINL.sub("\n", fused_test)
 
         return fused_test
 
@@ -483,29 +574,40 @@ opcache.jit=''' + jit_mode + '\n'
         Select a random seed from the loaded seeds.
         
         Returns:
-            tuple: Random seed information (code, variables, dataflow, etc.)
+            int: Index of the random seed in the seed_* lists
         """
-        return choice(self.seeds)
+        return randrange(self.seed_count)
 
     def load_classes(self):
         """
-        Load PHP classes from the database for class fuzzing.
-        Populates self.classes with class information.
+        Load PHP classes, attributes and methods from the database for class fuzzing.
+        Populates self.classes, self.class_attrs and self.class_methods so that
+        class fuzzing can pick from memory instead of querying the database.
         """
         # Connect to the SQLite database
         conn = sqlite3.connect(f'{self.test_root}/knowledges/class.db')
         cursor = conn.cursor()
 
-        # NOTE: SQL variable is not defined - this appears to be an error in the original code
-        # cursor.execute('SELECT id, class_name FROM classes')
-        cursor.execute(SQL)  # This line has an error - SQL is not defined
+        cursor.execute('SELECT id, class_name FROM classes')
         records = cursor.fetchall()
+
+        # Group attributes and methods by their class id
+        self.class_attrs = defaultdict(list)
+        cursor.execute('SELECT class_id, name FROM attributes')
+        for class_id, name in cursor.fetchall():
+            self.class_attrs[class_id].append(name)
+
+        self.class_methods = defaultdict(list)
+        cursor.execute('SELECT class_id, name, params_count FROM methods')
+        for class_id, name, params_count in cursor.fetchall():
+            self.class_methods[class_id].append((name, params_count))
+
         conn.close()
 
         if records:
             self.classes = records
         else:
-            print("No seeds available")
+            print('No classes found in the database.')
             exit()
 
     def load_apis(self):
@@ -533,7 +635,8 @@ opcache.jit=''' + jit_mode + '\n'
     def load_seeds(self):
         """
         Load seed test cases from the database.
-        Populates self.seeds with test case information.
+        Populates parallel self.seed_* lists (one entry per seed) with test case
+        information, already cleaned and parsed so fusion only has to index them.
         """
         conn = sqlite3.connect(f"{self.test_root}/knowledges/seeds.db")
         cursor = conn.cursor()
@@ -548,7 +651,23 @@ opcache.jit=''' + jit_mode + '\n'
         conn.close()
 
         if records:
-            self.seeds = records
+            self.seed_phpcodes = []
+            self.seed_variables = []
+            self.seed_dataflows = []
+            self.seed_descriptions = []
+            self.seed_configurations = []
+            self.seed_skipifs = []
+            self.seed_extensions = []
+            # Clean the code and parse the stored variable and dataflow lists once instead of per fusion
+            for phpcode, variable, dataflow, description, configuration, skipif, extension in records:
+                self.seed_phpcodes.append(self.clean_php_header_tail(phpcode))
+                self.seed_variables.append(ast.literal_eval(variable))
+                self.seed_dataflows.append(ast.literal_eval(dataflow))
+                self.seed_descriptions.append(description)
+                self.seed_configurations.append(configuration)
+                self.seed_skipifs.append(skipif)
+                self.seed_extensions.append(extension)
+            self.seed_count = len(records)
         else:
             print("No seeds available")
             exit()
@@ -567,9 +686,9 @@ opcache.jit=''' + jit_mode + '\n'
         if section not in test:
             return ""
         start_idx = test.find(section) + len(section)
-        end_match = re.search("--([_A-Z]+)--", test[start_idx:])
-        end_idx = end_match.start() if end_match else len(test) - 1
-        return test[start_idx:start_idx + end_idx].strip("\n")
+        end_match = _RE_SECTION.search(test, start_idx)
+        end_idx = end_match.start() if end_match else len(test)
+        return test[start_idx:end_idx].strip("\n")
 
     def zendiff_hotfunc_wrap(self, code):
         """
@@ -582,10 +701,8 @@ opcache.jit=''' + jit_mode + '\n'
         Returns:
             str: Wrapped PHP code
         """
-        code = code.strip('<?php')
-        code = f"<?php\nfunction make_it_hot() {{\n{code}\n}}\nmake_it_hot();\n"
-        code = re.sub(r'\n\s*\n', '\n', code)  # Remove empty lines
-        return code
+        code = _strip_php_open(code)
+        return f"<?php\nfunction make_it_hot() {{\n{code}\n}}\nmake_it_hot();\n"
 
     def zendiff_hotloop_wrap(self, code):
         """
@@ -598,10 +715,8 @@ opcache.jit=''' + jit_mode + '\n'
         Returns:
             str: Wrapped PHP code
         """
-        code = code.strip('<?php')
-        code = f"<?php\n{{\nfor ($i = 0; $i < 1; $i++) {{\n{code}\n}}\n}}\n"
-        code = re.sub(r'\n\s*\n', '\n', code)  # Remove empty lines
-        return code
+        code = _strip_php_open(code)
+        return f"<?php\n{{\nfor ($i = 0; $i < 1; $i++) {{\n{code}\n}}\n}}\n"
 
     def zendiff_strict_type(self, code):
         """
@@ -613,10 +728,8 @@ opcache.jit=''' + jit_mode + '\n'
         Returns:
             str: PHP code with strict types declaration
         """
-        code = code.strip('<?php')
-        code = f"<?php\ndeclare(strict_types=1);\n{code}\n"
-        code = re.sub(r'\n\s*\n', '\n', code)  # Remove empty lines
-        return code
+        code = _strip_php_open(code)
+        return f"<?php\ndeclare(strict_types=1);\n{code}\n"
 
     # ZendDiff --- Differential Testing between non-JIT and JIT executions
     def zendiff(self, test):
@@ -627,83 +740,84 @@ opcache.jit=''' + jit_mode + '\n'
             test (str): Original test case
             
         Returns:
-            tuple: (nonjit_test, hot_func_test, hot_loop_test) for different execution modes
+            tuple: (nonjit_test, jit_test) for different execution modes
         """
         # step 1: add nonjit and jit configurations
         jitconfig = self.zendiff_jit()
         nonjit_config = self.zendiff_nonjit()
-        if "--INI--" in test:
-            test_config_section = test.split("--INI--")[1].split('--')[0]
-            # test_config_section_lines = test_config_section.split('\n')
-            # new_test_config_section_lines = []
-            # for each in test_config_section_lines:
-            #    continue # dont keep any existing configuration
-            #    if "opcache." in each:
-            #        continue
-            #    new_test_config_section_lines.append(each)
-            # new_test_config_section = '\n'.join(new_test_config_section_lines)
-            # nonjit_test = test.replace(test_config_section, new_test_config_section)
-            # nonjit_test = nonjit_test.replace("--INI--\n--FILE--", "--FILE--")
-            # nonjit_test = nonjit_test.replace("--INI----FILE--", "--FILE--")
-            nonjit_test = test.replace("--FILE--", f"{nonjit_config}\n--FILE--")
-            jit_test = test.replace("--FILE--", f"{jitconfig}\n--FILE--")
-            #jit_test = test.replace(test_config_section, '\n'+jitconfig+'\n')
-        else:
-            nonjit_test = test.replace("--FILE--", f"--INI--\n{nonjit_config}\n--FILE--")
-            jit_test = test.replace("--FILE--", f"--INI--\n{jitconfig}\n--FILE--")
+        sections = _parse_phpt(test)
+        # NOTE: existing configurations are kept, the (non)JIT settings are appended to them
+        nonjit_test = _build_phpt(_append_ini(sections, nonjit_config))
+        jit_sections = _append_ini(sections, jitconfig)
+        jit_test = _build_phpt(jit_sections)
 
         return nonjit_test, jit_test
 
+        # # the --FILE-- code is looked up once and shared by both hot variants
+        # code = jit_sections["FILE"]
+
         # # step 2: wrap code in function and call for hot function JIT variant
-        # code = self.extract_sec(jit_test, "--FILE--")
-        # hotfunc = self.zendiff_hotfunc_wrap(code)
-        # hot_func_test = jit_test.replace(code, hotfunc)
+        # hot_func_test = _build_phpt({**jit_sections, "FILE": self.zendiff_hotfunc_wrap(code)})
 
         # # step 3: wrap code in loop for hot loop JIT variant
-        # code = self.extract_sec(jit_test, "--FILE--")
-        # hotloop = self.zendiff_hotloop_wrap(code)
-        # hot_loop_test = jit_test.replace(code, hotloop)
-        # hot_loop_test = hot_loop_test.replace("opcache.jit_hot_func=1", "opcache.jit_hot_loop=1")
+        # hot_loop_sections = {**jit_sections, "FILE": self.zendiff_hotloop_wrap(code)}
+        # hot_loop_sections["INI"] = hot_loop_sections["INI"].replace("opcache.jit_hot_func=1", "opcache.jit_hot_loop=1")
+        # hot_loop_test = _build_phpt(hot_loop_sections)
 
         # return nonjit_test, hot_func_test, hot_loop_test
 
+    # Generate and write one fused test case
+    def _gen_one(self, i):
+        """
+        Generate the i-th fused test case and write its PHPT variants.
+        
+        Args:
+            i (int): Index of the fused test (used in the output filenames)
+        """
+        self.fuse_count = i
+
+        # Generate a fused test
+        fused_test = self.fuse()
+        fused_test = fused_test.replace('?>','')
+
+        # Create differential variants (non-JIT, hot function, hot loop)
+        # nonjit_test, hot_func_test, hot_loop_test = self.zendiff(fused_test)
+        nonjit_test, jit_test = self.zendiff(fused_test)
+
+        # Write PHP files (non-JIT version appears to have a typo: nonjit_php is not defined)
+        # self.write_file(f"{self.php_root}/tests/fused/fused{self.fuse_count}.php", nonjit_php)  # Bug: nonjit_php not defined
+        # self.write_file(f"{self.php_root}/tests/fused/fused{self.fuse_count}_hot_func.php", hot_func_php)  # Bug: hot_func_php not defined
+        # self.write_file(f"{self.php_root}/tests/fused/fused{self.fuse_count}_hot_loop.php", hot_loop_php)  # Bug: hot_loop_php not defined
+
+        # Select one JIT test variant randomly
+        # jit_test = choice([hot_func_test, hot_loop_test])
+
+        # Write PHPT test files with various verification levels
+        fused_prefix = f"{self.php_root}/tests/fused/fused{self.fuse_count}"
+        self.write_file(f"{fused_prefix}.phpt", nonjit_test)
+        if self.verification>1:
+            _dup(f"{fused_prefix}.phpt", f"{fused_prefix}_check.phpt")
+        if self.verification>2:
+            _dup(f"{fused_prefix}.phpt", f"{fused_prefix}_check_.phpt")
+
+        self.write_file(f"{fused_prefix}_jit.phpt", jit_test)
+        if self.verification>1:
+            _dup(f"{fused_prefix}_jit.phpt", f"{fused_prefix}_jit_check.phpt")
+        if self.verification>2:
+            _dup(f"{fused_prefix}_jit.phpt", f"{fused_prefix}_jit_check_.phpt")
+
     # Main function to handle the test fusion process
     def main(self):
         """
         Main function to generate fused test cases.
-        Creates thousands of test cases for differential testing.
+        Creates thousands of test cases for differential testing,
+        spread over one worker process per CPU.
         """
         self.load_seeds()
         self.load_apis()
 
-        for i in range(10000):
-            self.fuse_count = i
-
-            # Generate a fused test
-            fused_test = self.fuse()
-            fused_test = fused_test.replace('?>','')
-
-            # Create differential variants (non-JIT, hot function, hot loop)
-            # nonjit_test, hot_func_test, hot_loop_test = self.zendiff(fused_test)
-            nonjit_test, jit_test = self.zendiff(fused_test)
-
-            # Write PHP files (non-JIT version appears to have a typo: nonjit_php is not defined)
-            # self.write_file(f"{self.php_root}/tests/fused/fused{self.fuse_count}.php", nonjit_php)  # Bug: nonjit_php not defined
-            # self.write_file(f"{self.php_root}/tests/fused/fused{self.fuse_count}_hot_func.php", hot_func_php)  # Bug: hot_func_php not defined
-            # self.write_file(f"{self.php_root}/tests/fused/fused{self.fuse_count}_hot_loop.php", hot_loop_php)  # Bug: hot_loop_php not defined
-
-            # Select one JIT test variant randomly
-            # jit_test = choice([hot_func_test, hot_loop_test])
-
-            # Write PHPT test files with various verification levels
-            self.write_file(f"{self.php_root}/tests/fused/fused{self.fuse_count}.phpt", nonjit_test)
-            if self.verification>1:
-                shutil.copy(f"{self.php_root}/tests/fused/fused{self.fuse_count}.phpt", f"{self.php_root}/tests/fused/fused{self.fuse_count}_check.phpt")
-            if self.verification>2:
-                shutil.copy(f"{self.php_root}/tests/fused/fused{self.fuse_count}.phpt", f"{self.php_root}/tests/fused/fused{self.fuse_count}_check_.phpt")
-
-            self.write_file(f"{self.php_root}/tests/fused/fused{self.fuse_count}_jit.phpt", jit_test)
-            if self.verification>1:
-                shutil.copy(f"{self.php_root}/tests/fused/fused{self.fuse_count}_jit.phpt", f"{self.php_root}/tests/fused/fused{self.fuse_count}_jit_check.phpt")
-            if self.verification>2:
-                shutil.copy(f"{self.php_root}/tests/fused/fused{self.fuse_count}_jit.phpt", f"{self.php_root}/tests/fused/fused{self.fuse_count}_jit_check_.phpt")
+        # Test cases are independent and write to disjoint files, so no locking is needed.
+        # NOTE: fork explicitly, workers inherit the loaded seeds and main.py has no __main__ guard
+        with multiprocessing.get_context("fork").Pool(os.cpu_count(), initializer=_init_worker, initargs=(self,)) as pool:
+            for _ in pool.imap_unordered(_gen_one_worker, range(10000), chunksize=64):
+                pass
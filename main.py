@@ -1,13 +1,188 @@
 import os
+import array
+import mmap
+import re
+import hashlib
 import random
+import signal
+import subprocess
 import glob
 import time
 import datetime
 import shutil
-import threading
+import traceback
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from xml.etree import ElementTree
+from itertools import repeat
 from fuse import Fusion
 from mutator import Mutator
 
+# Indices of the oracle's verification counters in a counts array
+(CHECK1, CHECK2, CHECK3,
+ CHECK1_PASS, CHECK2_PASS, CHECK3_PASS,
+ CHECK1_FAIL, CHECK2_FAIL, CHECK3_FAIL,
+ INCOMPLETE) = range(10)
+
+# Sanitizer stack frame ("#0 0x55d1c0ffee in zend_foo ...") capturing the frame number and function name
+_RE_STACK_FRAME = re.compile(r'#(\d+)\s+0x[0-9a-f]+ in (\S+)')
+
+# Allocator and sanitizer runtime frames, which top most sanitizer stacks and say nothing about the crash site
+_ALLOC_FRAMES = frozenset(("malloc", "calloc", "realloc", "free", "strdup", "strndup", "operator",
+                           "__zend_malloc", "__zend_calloc", "__zend_realloc", "_emalloc", "_ecalloc", "_erealloc",
+                           "_safe_emalloc", "_safe_erealloc", "_estrdup", "_estrndup", "_efree",
+                           "zend_string_alloc", "zend_string_init", "zend_string_safe_alloc"))
+_RUNTIME_FRAME_PREFIXES = ("__interceptor_", "__asan", "__lsan", "__ubsan", "__sanitizer", "_emalloc_", "_efree_")
+
+def file_digest(path, size):
+    """
+    Hash a file's bytes through a read-only memory map.
+    
+    Args:
+        path: Path to the file
+        size: Size of the file in bytes (from a prior stat)
+        
+    Returns:
+        blake2b digest of the file content
+    """
+    if size == 0:
+        return hashlib.blake2b(b"").digest()
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, prot=mmap.PROT_READ) as m:
+        return hashlib.blake2b(m).digest()
+
+def same_output(path1, path2):
+    """
+    Check whether two output files have identical content without decoding them.
+    
+    Args:
+        path1: Path to the first file
+        path2: Path to the second file
+        
+    Returns:
+        True if both files have the same bytes
+    """
+    # Different sizes can never match, so skip reading in that case
+    size1 = os.stat(path1).st_size
+    size2 = os.stat(path2).st_size
+    if size1 != size2:
+        return False
+    return file_digest(path1, size1) == file_digest(path2, size2)
+
+def read_output(path, suffix=None):
+    """
+    Read a test output file as bytes, optionally folding a verification suffix back to ".php".
+    
+    Outputs are only compared for equality, so they are not decoded here.
+    """
+    f = open(path, 'rb')
+    content = f.read()
+    f.close()
+    if suffix is not None:
+        content = content.replace(suffix + b".php", b".php")
+    return content
+
+def _verify_one(names, fused_dir, verification):
+    """
+    Run the multi-level JIT/non-JIT oracle on a single test case.
+    
+    Runs in a worker process, so it only reads files and never touches the bug folder.
+    
+    Args:
+        names: (jit_out, normal_out, normal_check, jit_check, normal_check_, jit_check_)
+               output file names; a sibling that was not produced is None
+        fused_dir: Directory holding the fused test outputs
+        verification: Number of verification levels to apply
+        
+    Returns:
+        dict with "counters" (indices of the counters to increment) and "bug"
+        ((normal_out_path, jit_out_path, normal_output, jit_output) with raw output bytes, or None)
+    """
+    jit_out, normal_out, normal_check, jit_check, normal_check_, jit_check_ = names
+    result = {"counters": [], "bug": None}
+    counters = result["counters"]
+
+    # First verification level: Check if JIT and non-JIT outputs differ
+    if normal_out is None:
+        return result
+    counters.append(CHECK1)
+    normal_out_path = f"{fused_dir}/{normal_out}"
+    jit_out_path = f"{fused_dir}/{jit_out}"
+
+    # Compare outputs (identical outputs, the common case, are never decoded)
+    if same_output(normal_out_path, jit_out_path):
+        # Outputs match, no bug
+        counters.append(CHECK1_PASS)
+        return result
+    counters.append(CHECK1_FAIL)
+    _normal_out = read_output(normal_out_path)
+    _jit_out = read_output(jit_out_path)
+
+    # Second verification level: Check if the difference is reproducible
+    if verification > 1:
+        if normal_check is None or jit_check is None:
+            counters.append(INCOMPLETE)
+            return result
+        counters.append(CHECK2)
+        _normal_check = read_output(f"{fused_dir}/{normal_check}", b"_check")
+        _jit_check = read_output(f"{fused_dir}/{jit_check}", b"_jit_check")
+
+        # If outputs differ from first run, it might be non-deterministic behavior
+        if _normal_out != _normal_check or _jit_out != _jit_check:
+            counters.append(CHECK2_PASS)
+            return result
+        # Outputs match first run, proceed to third verification
+        counters.append(CHECK2_FAIL)
+
+        if verification > 2:
+            if normal_check_ is None or jit_check_ is None:
+                counters.append(INCOMPLETE)
+                return result
+            counters.append(CHECK3)
+            _normal_check_ = read_output(f"{fused_dir}/{normal_check_}", b"_check_")
+            _jit_check_ = read_output(f"{fused_dir}/{jit_check_}", b"_jit_check_")
+
+            # Final verification check
+            if _normal_out != _normal_check_ or _jit_out != _jit_check_:
+                counters.append(CHECK3_PASS)
+                return result
+            # All verification levels confirm the bug
+            counters.append(CHECK3_FAIL)
+
+    result["bug"] = (normal_out_path, jit_out_path, _normal_out, _jit_out)
+    return result
+
+def crash_hash(output, frames=5):
+    """
+    Hash the top frames of the first sanitizer stack found in a test output.
+    
+    Allocator and sanitizer runtime frames are skipped, so that e.g. two leaks
+    allocated through _emalloc from different functions hash differently.
+    
+    Args:
+        output: Test output to scan
+        frames: Number of leading frames that identify the crash site
+        
+    Returns:
+        Hex digest of the frame function names, or None if there is no stack trace
+    """
+    names = []
+    started = False
+    for match in _RE_STACK_FRAME.finditer(output):
+        number, name = match.groups()
+        # Frame numbers restart at #0 where the next stack of the report begins
+        if number == "0" and started:
+            break
+        started = True
+        if name in _ALLOC_FRAMES or name.startswith(_RUNTIME_FRAME_PREFIXES):
+            continue
+        names.append(name)
+        if len(names) == frames:
+            break
+    if not names:
+        return None
+    return hashlib.blake2b("|".join(names).encode(), digest_size=8).hexdigest()
+
+
 # Class for handling PHP fuzzing process
 class PHPFuzz:
     """
@@ -35,6 +210,8 @@ class PHPFuzz:
 
         # Coverage feedback (disabled by default due to performance impact)
         self.coverage = False
+        self.cov_pool = ThreadPoolExecutor(max_workers=1)  # Runs gcovr off the fuzzing loop
+        self.cov_future = None                             # Pending coverage collection, if any
         
         # File system paths
         self.test_root = "/home/phpfuzz/WorkSpace/ZendDiff"  # Root directory for testing
@@ -43,6 +220,8 @@ class PHPFuzz:
         self.mutated = f"{self.php_root}/tests/mutated"        # Directory for mutated test cases
         self.bug_folder = f"{self.test_root}/bugs/"            # Directory to store found bugs
         self.log_path = "/tmp/test.log"                        # Log path for test execution
+        # Stack hashes of logged crashes (under backup/, which the periodic git clean keeps)
+        self.crash_path = f"{self.test_root}/backup/crash_sites"
 
         # Initialize environment and directory structure
         self.patch_run_test()      # Patch PHP's test runner to avoid conflicts
@@ -57,6 +236,9 @@ class PHPFuzz:
         self.total_count = 1           # Total number of tests executed
         self.syntax_error_count = 0    # Count of syntax errors encountered
         self.stopping_test_num = -1    # Stop after this many tests (-1 means infinite)     
+        self.bug_count = len(os.listdir(self.bug_folder))  # Number of bugs stored in the bug folder
+        self.next_bugid = self.bug_count + 1               # ID for the next logged bug
+        self.crash_hashes = self.load_crash_hashes()       # Crash sites already in the bug folder
 
         # Differential testing configuration
         self.verification = 2  # Level of verification (higher = more checks to reduce false positives)
@@ -72,9 +254,32 @@ class PHPFuzz:
         Note: We don't backup the latest run-tests.php as it may have updates.
         Instead, we keep a known working version in the backup folder.
         """
-        os.system(f"cp {self.php_root}/Makefile {self.test_root}/backup/")
-        os.system(f"cp {self.php_root}/libtool {self.test_root}/backup/")
-        os.system(f"cp {self.php_root}/run-tests.php {self.test_root}/backup/")
+        os.makedirs(f"{self.test_root}/backup", exist_ok=True)
+        for name in ("Makefile", "libtool", "run-tests.php"):
+            shutil.copyfile(f"{self.php_root}/{name}", f"{self.test_root}/backup/{name}")
+
+    def restore_initials(self):
+        """
+        Restore the backed up PHP configuration files into the PHP source directory.
+        """
+        for name in ("run-tests.php", "Makefile", "libtool"):
+            shutil.copyfile(f"{self.test_root}/backup/{name}", f"{self.php_root}/{name}")
+
+    def remove_files(self, root, suffixes):
+        """
+        Recursively delete files under a directory whose names end with one of the given suffixes.
+        
+        Args:
+            root: Directory to walk
+            suffixes: Tuple of filename suffixes to delete
+        """
+        for dirpath, dirnames, filenames in os.walk(root):
+            for filename in filenames:
+                if filename.endswith(suffixes):
+                    try:
+                        os.unlink(os.path.join(dirpath, filename))
+                    except OSError:
+                        pass
 
     def patch_run_test(self):
         """
@@ -85,34 +290,61 @@ class PHPFuzz:
         2. Prevent worker process termination
         3. Skip certain file iteration code paths
         """
-        os.chdir(self.php_root)
-        # Disable conflict checking by adding 'continue' in the conflict loop
-        os.system("sed -i 's/foreach (\$fileConflictsWith\[\$file\] as \$conflictKey) {/foreach (\$fileConflictsWith\[\$file\] as \$conflictKey) { continue;/g' ./run-tests.php")
-        # Comment out process termination commands
-        os.system("sed -i 's/proc_terminate(\$workerProcs\[\$i\]);/\/\/proc_terminate(\$workerProcs\[\$i\]);/' ./run-tests.php")
-        os.system("sed -i 's/unset(\$workerProcs\[\$i\], \$workerSocks\[\$i\]);/\/\/unset(\$workerProcs\[\$i\], \$workerSocks\[\$i\]);/' ./run-tests.php")
-        # Add continue to skip over file iteration
-        os.system("sed -i 's/foreach (\$test_files as \$i => \$file) {/foreach (\$test_files as \$i => \$file) { continue;/' ./run-tests.php")
-        os.chdir(self.test_root)
+        patches = [
+            # Disable conflict checking by adding 'continue' in the conflict loop
+            ("foreach ($fileConflictsWith[$file] as $conflictKey) {", "foreach ($fileConflictsWith[$file] as $conflictKey) { continue;"),
+            # Comment out process termination commands
+            ("proc_terminate($workerProcs[$i]);", "//proc_terminate($workerProcs[$i]);"),
+            ("unset($workerProcs[$i], $workerSocks[$i]);", "//unset($workerProcs[$i], $workerSocks[$i]);"),
+            # Add continue to skip over file iteration
+            ("foreach ($test_files as $i => $file) {", "foreach ($test_files as $i => $file) { continue;"),
+        ]
+        path = f"{self.php_root}/run-tests.php"
+
+        # The sentinel records the size and mtime of the run-tests.php we last patched
+        # (it lives in the backup folder, which the periodic git cleans keep)
+        sentinel = f"{self.test_root}/backup/run-tests.php.patched"
+        st = os.stat(path)
+        if os.path.exists(sentinel):
+            with open(sentinel) as f:
+                if f.read() == f"{st.st_size} {st.st_mtime_ns}":
+                    return
+
+        with open(path, "r", encoding="iso_8859_1") as f:
+            src = f.read()
+        patched = src
+        for old, new in patches:
+            # Skip patches that are already applied so repeated runs don't stack them
+            if new not in patched:
+                patched = patched.replace(old, new)
+        if patched != src:
+            with open(path, "w", encoding="iso_8859_1") as f:
+                f.write(patched)
+
+        st = os.stat(path)
+        os.makedirs(f"{self.test_root}/backup", exist_ok=True)
+        with open(sentinel, "w") as f:
+            f.write(f"{st.st_size} {st.st_mtime_ns}")
 
     def moveout_builtin_phpts(self):
         """
         Remove all built-in PHPT test files to avoid conflicts with fuzzer-generated tests.
         """
-        os.system(f"find {self.php_root} -name '*.phpt' | xargs rm 2>/dev/null")
+        self.remove_files(self.php_root, (".phpt",))
 
     def init_phpt_path(self):
         """
         Initialize the path to seed PHPT files by finding all PHPTs in the seed directory.
         """
-        os.system(f'find {self.test_root}/phpt_seeds/ -name "*.phpt" > {self.test_root}/testpaths')
+        paths = glob.iglob(f"{self.test_root}/phpt_seeds/**/*.phpt", recursive=True)
+        with open(f"{self.test_root}/testpaths", "w") as f:
+            f.write("".join(f"{path}\n" for path in paths))
 
     def init_bug_folder(self):
         """
         Create the bug folder if it doesn't exist to store discovered bugs.
         """
-        if not os.path.exists(self.bug_folder):
-            os.makedirs(self.bug_folder)
+        os.makedirs(self.bug_folder, exist_ok=True)
 
     def check_target_exist(self):
         """
@@ -134,7 +366,7 @@ class PHPFuzz:
         5. Commits changes to save the initial state
         """
         if not os.path.exists(self.fused):
-            os.system(f"mkdir {self.fused}")
+            os.makedirs(self.fused)
 
             # Check for dependencies in the phpt_deps folder
             dependency = f"{self.test_root}/phpt_deps"
@@ -143,18 +375,37 @@ class PHPFuzz:
                 exit(-1)
 
             # Restore dependencies and initial configuration
-            os.system(f"cp -R {dependency}/* {self.fused}")
-            os.system(f"cp {self.test_root}/backup/run-tests.php {self.php_root}/")
-            os.system(f"cp {self.test_root}/backup/Makefile {self.php_root}/")
-            os.system(f"cp {self.test_root}/backup/libtool {self.php_root}/")
+            shutil.copytree(dependency, self.fused, dirs_exist_ok=True)
+            self.restore_initials()
             
             # Create placeholder files in empty directories to preserve git structure
-            os.system(f"cd {self.php_root}/tests/fused/ && find . -type d -empty -exec touch {{}}/.gitkeep \;")
+            for dirpath, dirnames, filenames in os.walk(self.fused):
+                if not dirnames and not filenames:
+                    open(f"{dirpath}/.gitkeep", "w").close()
             
             # Save the initial state to git
-            os.system(f"cd {self.php_root} && git add ./tests/fused/ && git add -f ./tests/fused/* && git config --global user.email '0599jiangyc@gmail.com' && git config --global user.name 'fuzzsave' && git commit -m 'fuzzsave'")
+            for args in (["add", "./tests/fused/"],
+                         ["add", "-f", "./tests/fused/"],
+                         ["config", "--global", "user.email", "0599jiangyc@gmail.com"],
+                         ["config", "--global", "user.name", "fuzzsave"],
+                         ["commit", "-m", "fuzzsave"]):
+                if self.git(self.php_root, *args) != 0:
+                    break
             print("fused inited! git status saved!")
 
+    def git(self, repo, *args):
+        """
+        Run a git command directly (no intermediate shell) inside a repository.
+        
+        Args:
+            repo: Path of the repository to run the command in
+            *args: Arguments passed to git
+            
+        Returns:
+            Exit code of the git command
+        """
+        return subprocess.run(["git", *args], cwd=repo).returncode
+
     def check_build(self):
         """
         Check if the PHP CLI binary exists (indicating a successful build).
@@ -180,22 +431,62 @@ class PHPFuzz:
         if len(string1) > 59999 or len(string2) > 59999:
             return "too long to diff; please check manually"
             
+        # Identical strings have nothing to diff
+        if string1 == string2:
+            return ""
+            
         import difflib
-        differ = difflib.Differ()
         try:
-            # Use the compare method to get the differences
-            diff = differ.compare(string1.splitlines(), string2.splitlines())
+            # Use a unified diff with full context: bug_filter.py matches known false-positive
+            # markers anywhere in the stored diff, including on unchanged lines
+            lines1 = string1.splitlines()
+            lines2 = string2.splitlines()
+            diff = difflib.unified_diff(lines1, lines2, 'nonjit', 'jit', n=max(len(lines1), len(lines2)), lineterm='')
+            # Convert the diff to a formatted string in a single join
+            return '\n'.join(diff) + '\n'
         except Exception as e:
             print("error in diff strings")
             print(str(e))
             return "gg"
+
+    def load_crash_hashes(self):
+        """
+        Load the stack hashes of crashes logged by previous runs.
+        
+        Returns:
+            Set of crash hashes
+        """
+        if not os.path.exists(self.crash_path):
+            return set()
+        with open(self.crash_path) as f:
+            return set(f.read().split())
+
+    def is_duplicate_crash(self, normal_out, jit_out):
+        """
+        Check whether a confirmed bug is a crash at an already logged stack, recording it if not.
+        
+        Only a sanitizer stack that appears in one output but not the other counts as
+        the crash being the difference; every other bug is always logged.
+        
+        Args:
+            normal_out: Non-JIT test output
+            jit_out: JIT test output
             
-        # Convert the diff to a formatted string
-        diff_list = list(diff)
-        diffs = ""
-        for line in diff_list:
-            diffs += line + '\n'
-        return diffs
+        Returns:
+            True if the crash site was already logged
+        """
+        normal_hash = crash_hash(normal_out)
+        jit_hash = crash_hash(jit_out)
+        if (normal_hash is None) == (jit_hash is None):
+            # No stack, or stacks on both sides: the difference is not (only) the crash
+            return False
+        h = normal_hash if jit_hash is None else jit_hash
+        if h in self.crash_hashes:
+            return True
+        self.crash_hashes.add(h)
+        with open(self.crash_path, "a") as f:
+            f.write(h + "\n")
+        return False
 
     def buglog(self, bugid, normal_out_path, jit_out_path, diff):
         """
@@ -208,22 +499,32 @@ class PHPFuzz:
             diff: Diff string between the outputs
         """
         # Create a directory for this bug
-        os.makedirs(f"{self.bug_folder}/{bugid}")
+        bug_dir = f"{self.bug_folder}/{bugid}"
+        os.makedirs(bug_dir)
         
-        # Copy all related files (preserving original extensions)
-        os.system(f"cp {normal_out_path.split('.')[0]}.* {self.bug_folder}/{bugid}/")
-        os.system(f"cp {jit_out_path.split('.')[0]}.* {self.bug_folder}/{bugid}/")
+        # Hardlink all related files (preserving original extensions); fall back
+        # to a copy when the bug folder is on another filesystem
+        for out_path in (normal_out_path, jit_out_path):
+            for src in glob.iglob(f"{glob.escape(os.path.splitext(out_path)[0])}.*"):
+                try:
+                    os.link(src, f"{bug_dir}/{os.path.basename(src)}")
+                except OSError:
+                    shutil.copy2(src, bug_dir)
         
         # Save the diff to a file
-        f = open(f"{self.bug_folder}/{bugid}/diff", "w")
+        f = open(f"{bug_dir}/diff", "w")
         f.write(diff)
         f.close()
 
+        # Keep the cached bug counters in sync with the bug folder
+        self.bug_count += 1
+        self.next_bugid = bugid + 1
+
     #
     # DIFFERENTIAL TESTING IMPLEMENTATION
     #
 
-    def zendiff_parse_log(self):
+    def zendiff_parse_log(self, names):
         """
         Differential testing oracle to find bugs by comparing JIT and non-JIT output.
         
@@ -234,17 +535,29 @@ class PHPFuzz:
         
         The method counts passing and failing test cases at each verification level
         and logs potential bugs to the bug folder.
-        """
-        # Initialize counters for various verification levels
-        self.check1_count = 0
-        self.check2_count = 0
-        self.check3_count = 0
-        self.check1_pass_count = 0
-        self.check2_pass_count = 0
-        self.check3_pass_count = 0
-        self.check1_fail_count = 0
-        self.check2_fail_count = 0
-        self.check3_fail_count = 0
+        
+        Args:
+            names: File names in the fused test directory after the test run
+        """
+        # Get all output files from the fused test directory listing in a single pass.
+        # outputs is a set so sibling lookups are O(1); jit_prefixes are the test
+        # names of the JIT outputs (but not the verification ones) that drive the checks
+        outputs = set()
+        jit_prefixes = []
+        for each_file in names:
+            if each_file.endswith(".out"):
+                outputs.add(each_file)
+                if each_file.endswith("_jit.out"):
+                    jit_prefixes.append(each_file[:-len("_jit.out")])
+                
+        print("test case number:", len(outputs) / 4)
+
+        # Nothing to verify (e.g. the test run timed out before producing any JIT output)
+        if not jit_prefixes:
+            return
+        
+        # Initialize counters for various verification levels (indexed by CHECK1 ... CHECK3_FAIL)
+        self.check_counts = array.array('Q', [0] * 9)
         self.verification = 2
         self.check = 0  # count of test cases checked by oracle
         self.check_oprec = []
@@ -254,152 +567,72 @@ class PHPFuzz:
         self.opcode3 = set()
         self.opcode_rec = []
         
-        # Get all output files from fused test directory
-        allfiles = os.listdir(f"{self.php_root}/tests/fused/")
-        outputs = []
-        for each_file in allfiles:
-            if each_file.endswith(".out"):
-                outputs.append(each_file)
-                
-        # Initialize bug ID counter
-        bugid = len(os.listdir(self.bug_folder)) + 1
-        print("test case number:", len(outputs) / 4)
+        # Local counters for this batch (indexed by CHECK1 ... INCOMPLETE)
+        counts = array.array('Q', [0] * 10)
         
-        # Local counters for this batch
-        check1_count = 0
-        check2_count = 0
-        check3_count = 0
-        check1_pass_count = 0
-        check2_pass_count = 0
-        check3_pass_count = 0
-        check1_fail_count = 0
-        check2_fail_count = 0
-        check3_fail_count = 0
-        incomplete_count = 0
-        all_outputs = ""
-        
-        # Process each output file
-        for each_output in outputs:
-            if self.verification > 0:
-                # Find JIT output files (but not the verification ones)
-                if "_jit" in each_output and "_jit_check" not in each_output:
-                    self.total_count += 1
-                    normal_out = each_output.replace("_jit", "")
-                    jit_out = each_output
-                    
-                    # First verification level: Check if JIT and non-JIT outputs differ
-                    if normal_out in outputs:
-                        check1_count += 1
-                        normal_out_path = f"{self.php_root}/tests/fused/{normal_out}"
-                        jit_out_path = f"{self.php_root}/tests/fused/{jit_out}"
-
-                        # Read non-JIT output
-                        f = open(normal_out_path, 'r', encoding="iso_8859_1")
-                        _normal_out = f.read()
-                        f.close()
-
-                        # Read JIT output
-                        f = open(jit_out_path, 'r', encoding="iso_8859_1")
-                        _jit_out = f.read()
-                        f.close()
-
-                        # Compare outputs
-                        if _normal_out != _jit_out:
-                            check1_fail_count += 1
-                            
-                            # Second verification level: Check if the difference is reproducible
-                            if self.verification > 1:
-                                normal_check = each_output.replace("_jit", "_check")
-                                jit_check = each_output.replace("_jit", "_jit_check")
-                                
-                                if normal_check in outputs and jit_check in outputs:
-                                    check2_count += 1
-                                    normal_check_path = f"{self.php_root}/tests/fused/{normal_check}"
-                                    jit_check_path = f"{self.php_root}/tests/fused/{jit_check}"
-
-                                    # Read verification outputs
-                                    f = open(normal_check_path, 'r', encoding="iso_8859_1")
-                                    _normal_check = f.read().replace("_check.php", ".php")
-                                    f.close()
-
-                                    f = open(jit_check_path, 'r', encoding="iso_8859_1")
-                                    _jit_check = f.read().replace("_jit_check.php", ".php")
-                                    f.close()
-                                    
-                                    # If outputs differ from first run, it might be non-deterministic behavior
-                                    if _normal_out != _normal_check or _jit_out != _jit_check:
-                                        check2_pass_count += 1
-                                        continue
-                                    else:
-                                        # Outputs match first run, proceed to third verification
-                                        check2_fail_count += 1
-                                        if self.verification > 2:
-                                            normal_check_ = each_output.replace("_jit", "_check_")
-                                            jit_check_ = each_output.replace("_jit", "_jit_check_")
-                                            
-                                            if normal_check_ in outputs and jit_check_ in outputs:
-                                                check3_count += 1
-                                                normal_check__path = f"{self.php_root}/tests/fused/{normal_check_}"
-                                                jit_check__path = f"{self.php_root}/tests/fused/{jit_check_}"
-
-                                                # Read third verification outputs
-                                                f = open(normal_check__path, 'r', encoding="iso_8859_1")
-                                                _normal_check_ = f.read().replace("_check_.php", ".php")
-                                                f.close()
-
-                                                f = open(jit_check__path, 'r', encoding="iso_8859_1")
-                                                _jit_check_ = f.read().replace("_jit_check_.php", ".php")
-                                                f.close()
-                                                
-                                                # Final verification check
-                                                if _normal_out != _normal_check_ or _jit_out != _jit_check_:
-                                                    check3_pass_count += 1
-                                                    continue
-                                                else:
-                                                    # All verification levels confirm the bug
-                                                    check3_fail_count += 1
-                                            else:
-                                                incomplete_count += 1
-                                                continue
-                                else:
-                                    incomplete_count += 1
-                                    continue
-                                    
-                            # Log the bug with a diff of the outputs
-                            diff = self.diff_two_strings(_normal_out, _jit_out)
-                            self.buglog(bugid, normal_out_path, jit_out_path, diff)
-                            bugid += 1
-                        else:
-                            # Outputs match, no bug
-                            check1_pass_count += 1
+        # Resolve which sibling outputs exist for each JIT output file
+        cases = []
+        if self.verification > 0:
+            self.total_count += len(jit_prefixes)
+            for prefix in jit_prefixes:
+                siblings = (prefix + ".out",
+                            prefix + "_check.out",
+                            prefix + "_jit_check.out",
+                            prefix + "_check_.out",
+                            prefix + "_jit_check_.out")
+                cases.append((prefix + "_jit.out",) + tuple(name if name in outputs else None for name in siblings))
+
+        # Verify test cases in parallel; bugs are logged here so bug ids stay sequential
+        fused_dir = f"{self.php_root}/tests/fused"
+        with ProcessPoolExecutor(max_workers=os.cpu_count(),
+                                 mp_context=multiprocessing.get_context("fork")) as ex:
+            for res in ex.map(_verify_one, cases, repeat(fused_dir), repeat(self.verification), chunksize=64):
+                for counter in res["counters"]:
+                    counts[counter] += 1
+                if res["bug"] is not None:
+                    # Log the bug with a diff of the outputs
+                    normal_out_path, jit_out_path, _normal_out, _jit_out = res["bug"]
+                    _normal_out = _normal_out.decode("iso_8859_1")
+                    _jit_out = _jit_out.decode("iso_8859_1")
+                    if self.is_duplicate_crash(_normal_out, _jit_out):
+                        continue
+                    diff = self.diff_two_strings(_normal_out, _jit_out)
+                    self.buglog(self.next_bugid, normal_out_path, jit_out_path, diff)
 
         # Print verification statistics for this batch
-        print("check1[total,pass,fail]:", check1_count, check1_pass_count, check1_fail_count)
-        print("check2[total,pass,fail]:", check2_count, check2_pass_count, check2_fail_count)
-        print("check3[total,pass,fail]:", check3_count, check3_pass_count, check3_fail_count)
-        print("incomplete_count", incomplete_count)
+        print("check1[total,pass,fail]:", counts[CHECK1], counts[CHECK1_PASS], counts[CHECK1_FAIL])
+        print("check2[total,pass,fail]:", counts[CHECK2], counts[CHECK2_PASS], counts[CHECK2_FAIL])
+        print("check3[total,pass,fail]:", counts[CHECK3], counts[CHECK3_PASS], counts[CHECK3_FAIL])
+        print("incomplete_count", counts[INCOMPLETE])
         
         # Update cumulative statistics
-        self.check1_count += check1_count
-        self.check2_count += check2_count
-        self.check3_count += check3_count
-        self.check1_pass_count += check1_pass_count
-        self.check2_pass_count += check2_pass_count
-        self.check3_pass_count += check3_pass_count
-        self.check1_fail_count += check1_fail_count
-        self.check2_fail_count += check2_fail_count
-        self.check3_fail_count += check3_fail_count
+        check_counts = self.check_counts
+        for i in range(len(check_counts)):
+            check_counts[i] += counts[i]
         
         # Print cumulative statistics
-        print("total check1[total,pass,fail]:", self.check1_count, self.check1_pass_count, self.check1_fail_count)
-        print("total check2[total,pass,fail]:", self.check2_count, self.check2_pass_count, self.check2_fail_count)
-        print("total check3[total,pass,fail]:", self.check3_count, self.check3_pass_count, self.check3_fail_count)
+        print("total check1[total,pass,fail]:", check_counts[CHECK1], check_counts[CHECK1_PASS], check_counts[CHECK1_FAIL])
+        print("total check2[total,pass,fail]:", check_counts[CHECK2], check_counts[CHECK2_PASS], check_counts[CHECK2_FAIL])
+        print("total check3[total,pass,fail]:", check_counts[CHECK3], check_counts[CHECK3_PASS], check_counts[CHECK3_FAIL])
 
-    def clean(self):
+    def clean(self, names=None):
         """
         Clean up test artifacts by removing temporary files from the fused test directory.
-        """
-        os.system(f"find {self.fused} -type f -name '*.log' -o -name '*.out' -o -name '*.diff' -o -name '*.sh' -o -name '*.php' -o -name '*.phpt' | xargs rm 2>/dev/null")
+        
+        Args:
+            names: File names from this round's listing of the fused test directory;
+                   if None, the whole directory tree is walked instead
+        """
+        suffixes = (".log", ".out", ".diff", ".sh", ".php", ".phpt")
+        if names is None:
+            self.remove_files(self.fused, suffixes)
+            return
+        for name in names:
+            if name.endswith(suffixes):
+                try:
+                    os.unlink(f"{self.fused}/{name}")
+                except OSError:
+                    pass
 
     def collect_cov(self, fuzztime):
         """
@@ -409,25 +642,72 @@ class PHPFuzz:
             fuzztime: Current fuzzing time (used in output filename)
         """
         def run_coverage_collection():
-            # Change to PHP source directory
-            os.chdir(self.php_root)
-            
-            # Run gcovr to collect coverage, excluding third-party libraries
-            cmd = f"gcovr -sr . -o /tmp/gcovr-{fuzztime}.xml --xml --exclude-directories 'ext/date/lib$$' -e 'ext/bcmath/libbcmath/.*' -e 'ext/date/lib/.*' -e 'ext/fileinfo/libmagic/.*' -e 'ext/gd/libgd/.*' -e 'ext/hash/sha3/.*' -e 'ext/mbstring/libmbfl/.*' -e 'ext/pcre/pcre2lib/.*' > /dev/null"
-            os.system(cmd)
-            
-            # Return to test root directory
-            os.chdir(self.test_root)
+            # Run gcovr in the PHP source directory to collect coverage, excluding third-party libraries
+            cmd = ["gcovr", "-sr", ".", "-o", f"/tmp/gcovr-{fuzztime}.xml", "--xml", "--exclude-directories", "ext/date/lib$$",
+                   "-e", "ext/bcmath/libbcmath/.*", "-e", "ext/date/lib/.*", "-e", "ext/fileinfo/libmagic/.*", "-e", "ext/gd/libgd/.*",
+                   "-e", "ext/hash/sha3/.*", "-e", "ext/mbstring/libmbfl/.*", "-e", "ext/pcre/pcre2lib/.*"]
+            subprocess.run(cmd, cwd=self.php_root, stdout=subprocess.DEVNULL, check=True)
             
-            # Parse coverage percentage from XML output
-            with open(f"/tmp/gcovr-{fuzztime}.xml", "r") as f:
-                x = f.read()
-            self.coverage = float(x.split('line-rate="')[1].split('"')[0])
+            # Parse coverage percentage from the root element of the XML output
+            with open(f"/tmp/gcovr-{fuzztime}.xml", "rb") as f:
+                for _, elem in ElementTree.iterparse(f, events=("start",)):
+                    self.coverage = float(elem.get("line-rate"))
+                    break
             print(f"Coverage: {self.coverage:.2%}")
 
-        # Run coverage collection in a separate thread to avoid blocking
-        coverage_thread = threading.Thread(target=run_coverage_collection)
-        coverage_thread.start()
+        # Skip this round if the previous collection is still running
+        if self.cov_future is not None and not self.cov_future.done():
+            return
+
+        def report_coverage_error(future):
+            # Nothing calls result() on the future, so print failures (e.g. gcovr missing or failing) here
+            if future.exception() is not None:
+                print("coverage collection failed:")
+                traceback.print_exception(future.exception())
+
+        # Run coverage collection on the worker thread to avoid blocking
+        self.cov_future = self.cov_pool.submit(run_coverage_collection)
+        self.cov_future.add_done_callback(report_coverage_error)
+
+    def run_tests(self):
+        """
+        Run PHP's test suite on the generated tests and record the failing ones.
+        
+        The FAIL lines are filtered while make test is still streaming its output
+        and written to the test log.
+        
+        Returns:
+            List of FAIL lines (bytes) reported by run-tests.php
+        """
+        cmd = ["timeout", "30", "make", "test", "TEST_PHP_ARGS=-j32 --set-timeout 5 --offline"]
+        with subprocess.Popen(cmd, cwd=self.php_root, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL) as p:
+            fail_lines = [line for line in p.stdout if b"FAIL" in line]
+        with open(self.log_path, "wb") as f:
+            f.writelines(fail_lines)
+        return fail_lines
+
+    def kill_matching(self, needle):
+        """
+        Kill (SIGKILL) all processes whose command line contains the given string.
+        
+        Args:
+            needle: Substring to look for in each process's command line (e.g. a binary path)
+        """
+        needle = needle.encode()
+        for entry in os.scandir("/proc"):
+            if not entry.name.isdigit():
+                continue
+            pid = int(entry.name)
+            if pid == os.getpid():
+                continue
+            try:
+                with open(f"/proc/{pid}/cmdline", "rb") as f:
+                    cmdline = f.read().replace(b"\0", b" ")
+                if needle in cmdline:
+                    os.kill(pid, signal.SIGKILL)
+            except (FileNotFoundError, ProcessLookupError, PermissionError):
+                # The process exited or is not ours to kill
+                continue
 
     def runtime_log(self, seconds, rounds):
         """
@@ -437,11 +717,8 @@ class PHPFuzz:
             seconds: Total execution time in seconds
             rounds: Number of fuzzing rounds completed
         """
-        # Count bugs found
-        bugs_found = len(os.listdir(f"{self.test_root}/bugs/"))
-        
         # Print statistics
-        print(f"\ntime: {int(seconds)} seconds | bugs found: {bugs_found} | tests executed: {self.total_count} | throughput: {self.total_count/seconds} tests per second\n")
+        print(f"\ntime: {int(seconds)} seconds | bugs found: {self.bug_count} | tests executed: {self.total_count} | throughput: {self.total_count/seconds} tests per second\n")
         
         # Print coverage if available
         if self.coverage != 0:
@@ -484,6 +761,9 @@ class PHPFuzz:
         # Initialize the Fusion engine for test case generation
         phpFusion = Fusion(self.test_root, self.php_root, self.apifuzz, self.ini, self.mutation, self.verification)
 
+        # Clean test artifacts left over from a previous run
+        self.clean()
+
         # Main fuzzing loop
         while True:
             count += 1
@@ -491,32 +771,32 @@ class PHPFuzz:
             # Periodically clean the environment and restore configurations
             if count % 10 == 0:
                 # Clean the test folder while preserving important directories
-                os.system(f"cd {self.test_root} && git clean -fd -e php-src -e phpt_deps -e phpt_seeds -e knowledges -e backup -e bugs -e testpaths")
-                os.system(f"cp {self.test_root}/backup/run-tests.php {self.php_root}/")
-                os.system(f"cp {self.test_root}/backup/Makefile {self.php_root}/")
-                os.system(f"cp {self.test_root}/backup/libtool {self.php_root}/")
-                
-            # Clean test artifacts
-            self.clean()
+                self.git(self.test_root, "clean", "-fd", "-e", "php-src", "-e", "phpt_deps", "-e", "phpt_seeds", "-e", "knowledges", "-e", "backup", "-e", "bugs", "-e", "testpaths")
+                self.restore_initials()
 
             # Generate new test cases using Fusion engine
             phpFusion.main()
 
             # Execute test cases with timeout and parallelism
-            os.chdir(self.php_root)
-            os.system('timeout 30 make test TEST_PHP_ARGS="-j32 --set-timeout 5 --offline" 2>/dev/null | grep "FAIL" > /tmp/test.log')
-            os.chdir(self.test_root)
+            self.run_tests()
             
             # Fix permissions and clean up stray processes
             os.system(f"chmod -R 777 {self.test_root} 2>/dev/null")
-            os.system("kill -9 `ps aux | grep \"/home/phpfuzz/WorkSpace/ZendDiff/php-src/sapi/cli/php\" | grep -v grep | awk '{print $2}'` > /dev/null 2>&1")
-            os.system("kill -9 `ps aux | grep \"/home/phpfuzz/WorkSpace/ZendDiff/php-src/sapi/phpdbg/phpdbg\" | grep -v grep | awk '{print $2}'` > /dev/null 2>&1")
+            self.kill_matching(f"{self.php_root}/sapi/cli/php")
+            self.kill_matching(f"{self.php_root}/sapi/phpdbg/phpdbg")
             
+            # List the fused test directory once; the oracle and the cleanup share it
+            with os.scandir(self.fused) as entries:
+                names = [entry.name for entry in entries]
+
             # Analyze results using differential testing
-            self.zendiff_parse_log()
+            self.zendiff_parse_log(names)
+
+            # Clean test artifacts
+            self.clean(names)
 
             # Clean up git repository
-            os.system(f"cd {self.php_root} && git clean -fd > /dev/null")
+            self.git(self.php_root, "clean", "-fdq")
 
             # Collect coverage periodically
             end = time.time()
@@ -17,7 +17,8 @@ def run_test(cmd, bug_output):
 
 
     # Check if the bug output or any sanitizer errors are in the stdout/stderr
-    if not (bug_output in result.stdout or bug_output in result.stderr) and \
+    found = bug_output in result.stdout or bug_output in result.stderr
+    if not found and \
        ("LeakSanitizer" not in result.stdout and "LeakSanitizer" not in result.stderr):
 
         # If another sanitizer message shows up, print the error
@@ -28,13 +29,13 @@ def run_test(cmd, bug_output):
             # Uncomment below if you want to pause for input when this happens
             # input()
 
-    if bug_output in result.stdout or bug_output in result.stderr:
+    if found:
         global stdouterr
         if stdouterr == None:
             stdouterr = result.stderr
 
     # Return True if the bug output is found in the test results
-    return bug_output in result.stdout or bug_output in result.stderr
+    return found
 
 # Function to minimize the test case by removing lines
 def minimize_testcase(lines, bug_output, testpath, reproduce_cmd):